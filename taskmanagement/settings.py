@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -25,9 +25,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = config('SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Also, hashed static file names (and their far-future caching) only apply with DEBUG off
+DEBUG = config('DEBUG', default=True, cast=bool)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='', cast=Csv())
 
 
 # Application definition
@@ -46,6 +47,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'taskmanager.middleware.StaticFilesMiddleware',
+    'taskmanager.middleware.CompressionMiddleware',
+    'taskmanager.middleware.TenantMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -123,6 +127,13 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'  # Add this line (required for collectstatic)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Content-hashed names plus .gz/.br siblings, written once by collectstatic at image build time
+    'staticfiles': {'BACKEND': 'taskmanager.storage.CompressedManifestStaticFilesStorage'},
+}
+# Browser cache lifetime for hashed static files served by StaticFilesMiddleware
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -132,14 +143,88 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # DRF + JWT
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'taskmanager.authentication.RoleClaimsAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'taskmanager.throttling.TokenBucketThrottle',
+    ],
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-}
\ No newline at end of file
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Responses stored for Idempotency-Key retries: bounded and expiring. Point it at a
+    # shared backend when several worker processes serve the API.
+    'idempotency': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'idempotency',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+IDEMPOTENCY_CACHE = 'idempotency'
+IDEMPOTENCY_LOCK_TIMEOUT = 60  # seconds a key stays claimed by a request that never finishes
+
+# How long a worker trusts its cached copy of a user's role version (JWT revocation delay)
+ROLE_VERSION_CACHE_TIMEOUT = 60
+
+# Tenant serving hosts that match no Tenant.domain, and owning rows created outside requests;
+# '' answers unknown hosts with 404
+DEFAULT_TENANT_DOMAIN = config('DEFAULT_TENANT_DOMAIN', default='localhost')
+TENANT_CACHE_TIMEOUT = 300
+
+# Team created for existing users by migration 0009; preselected when creating users in the panel
+DEFAULT_TEAM_NAME = 'Default'
+# How long an admin's managed team ids and visible user ids stay cached
+TEAM_SCOPE_CACHE_TIMEOUT = 300
+
+# Token-bucket rate limits: 'N/period' is a burst of N refilled evenly over the period
+RATE_LIMITS = {
+    'login_ip': '30/min',
+    'login_username': '10/min',
+    'api': '600/min',
+}
+# SQLite file shared by all worker processes on the host; '' keeps buckets in process memory
+RATE_LIMIT_STORE = config('RATE_LIMIT_STORE', default=str(BASE_DIR / 'ratelimit.sqlite3'))
+
+# Response compression (gzip, or brotli when the package is installed)
+COMPRESSION_MIN_LENGTH = 1024
+
+# Rows fetched per database round trip when streaming task lists
+STREAM_CHUNK_SIZE = 500
+
+# Maximum number of ranked hits returned by /api/tasks/search/
+SEARCH_RESULTS_LIMIT = 50
+
+# Seconds /api/analytics/hours/ results are reused before being recomputed
+ANALYTICS_CACHE_TIMEOUT = 300
+
+# Background jobs (python manage.py run_jobs)
+JOB_RETRY_BACKOFF = 5  # seconds, doubled on every failed attempt
+JOB_MAX_BACKOFF = 3600
+JOB_LOCK_TIMEOUT = 600  # running jobs older than this are requeued
+
+# Rows removed per transaction by background cascades (e.g. user deletion)
+DELETE_BATCH_SIZE = 1000
+# Deleted users and tasks can be restored for this long (python manage.py purge_deleted)
+SOFT_DELETE_RETENTION_DAYS = 30
+
+# Completed tasks older than this move to the archive table (python manage.py archive_tasks)
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_BATCH_SIZE = 1000
+
+# Due-date reminders (python manage.py send_due_reminders)
+REMINDER_BACKEND = 'taskmanager.reminders.ConsoleBackend'  # or FileBackend / EmailBackend
+REMINDER_FILE_PATH = BASE_DIR / 'reminders.log'
+REMINDER_DUE_SOON_DAYS = 2
+REMINDER_WINDOW_DAYS = 1  # each task is notified at most once per window
+REMINDER_BATCH_SIZE = 500
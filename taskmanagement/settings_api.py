@@ -0,0 +1,34 @@
+"""
+API-only worker profile: DJANGO_SETTINGS_MODULE=taskmanagement.settings_api
+
+Serves just the JWT API (taskmanager.api_urls). The Django admin, the HTML
+admin panel, templates and the session/CSRF/messages middleware are never
+imported, so each worker boots faster and holds less memory. Run the full
+profile (taskmanagement.settings) for the panel and for migrations.
+"""
+from .settings import *  # noqa: F401,F403
+
+WEB_ONLY_APPS = {
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+}
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in WEB_ONLY_APPS]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'taskmanager.middleware.CompressionMiddleware',
+    'taskmanager.middleware.TenantMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+ROOT_URLCONF = 'taskmanagement.urls_api'
+
+TEMPLATES = []
+
+# JSON only: the browsable API renderer needs templates and pulls in the form machinery
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+}
@@ -0,0 +1,16 @@
+"""
+Test profile: picked by `python manage.py test` unless DJANGO_SETTINGS_MODULE is set.
+
+Same apps and middleware as taskmanagement.settings, minus the costs that only
+matter in production: passwords are hashed with MD5 instead of PBKDF2 (every
+create_user and login hashes), rate-limit buckets live in process memory
+instead of a shared SQLite file, and the test runner fans out over all cores.
+"""
+from .settings import *  # noqa: F401,F403
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+RATE_LIMIT_STORE = ''
+
+# Parallel by default; pass --parallel 1 to debug a single failure
+TEST_RUNNER = 'taskmanagement.test_runner.ParallelDiscoverRunner'
@@ -0,0 +1,16 @@
+from django.test.runner import DiscoverRunner
+
+try:
+    import tblib  # noqa: F401
+except ImportError:  # without tblib, failures inside worker processes lose their tracebacks
+    tblib = None
+
+
+class ParallelDiscoverRunner(DiscoverRunner):
+    """DiscoverRunner that defaults to --parallel auto (one process per core) when tblib is installed."""
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        if tblib is not None:
+            parser.set_defaults(parallel='auto')
@@ -0,0 +1,6 @@
+"""URL configuration for API-only workers (taskmanagement.settings_api)."""
+from django.urls import include, path
+
+urlpatterns = [
+    path('', include('taskmanager.api_urls')),
+]
@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User, Group
-from .models import Task
+from django.utils import timezone
+from .models import Task, Job, ArchivedTask, Team, TeamMembership, Tenant, TenantRole
+from .search import search_tasks
 
 # Unregister defaults
 admin.site.unregister(User)
@@ -10,30 +12,77 @@ admin.site.unregister(Group)
 # Register Task
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
-    list_display = ['title', 'assigned_to', 'status', 'due_date', 'worked_hours']
-    list_filter = ['status', 'due_date', 'assigned_to']
+    list_display = ['title', 'assigned_to', 'status', 'due_date', 'worked_hours', 'deleted_at']
+    list_filter = ['status', 'due_date', 'assigned_to', ('deleted_at', admin.EmptyFieldListFilter)]
     search_fields = ['title', 'description']
-    readonly_fields = ['completion_report', 'worked_hours']
+    readonly_fields = ['completion_report', 'worked_hours', 'deleted_at']
+    actions = ['move_to_trash', 'restore']
+
+    def get_queryset(self, request):
+        # Trashed tasks stay reachable here until purge_deleted removes them
+        return Task.all_objects.select_related('assigned_to')
+
+    @admin.action(description='Move selected tasks to the trash')
+    def move_to_trash(self, request, queryset):
+        queryset.filter(deleted_at__isnull=True).update(deleted_at=timezone.now())
+
+    @admin.action(description='Restore selected tasks')
+    def restore(self, request, queryset):
+        queryset.update(deleted_at=None)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_tasks(queryset, search_term), False
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(admin.ModelAdmin):
+    list_display = ['title', 'assigned_to', 'completed_at', 'worked_hours', 'archived_at']
+    list_filter = ['archived_at']
+    search_fields = ['title']
+    readonly_fields = ['completion_report', 'worked_hours', 'completed_at', 'archived_at']
+
+# Roles are per tenant; the inline shows and edits the ones in the tenant serving this admin
+class TenantRoleInline(admin.TabularInline):
+    model = TenantRole
+    extra = 1
 
 # Custom User Admin
 class CustomUserAdmin(UserAdmin):
-    list_display = ['username', 'email', 'is_staff', 'get_groups']
-    list_filter = ['groups', 'is_staff', 'is_superuser']
+    list_display = ['username', 'email', 'is_staff', 'get_roles']
+    list_filter = ['is_staff', 'is_superuser']
+    inlines = [TenantRoleInline]
 
-    def get_groups(self, obj):
-        return ", ".join([g.name for g in obj.groups.all()]) or 'None'
-    get_groups.short_description = 'Groups/Roles'
-
-    def get_fieldsets(self, request, obj=None):
-        fieldsets = super().get_fieldsets(request, obj)
-        # Append groups to the last fieldset instead of creating duplicate
-        fieldsets = list(fieldsets)
-        fieldsets[-1] = (fieldsets[-1][0], {'fields': fieldsets[-1][1]['fields'] + ('groups',)})
-        return fieldsets
+    def get_roles(self, obj):
+        return ", ".join(sorted(TenantRole.names(obj))) or 'None'
+    get_roles.short_description = 'Roles'
 
 admin.site.register(User, CustomUserAdmin)
 
 # Register Group
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ['name']
\ No newline at end of file
+    list_display = ['name']
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'processed', 'total', 'run_at', 'updated_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['attempts', 'locked_at', 'last_error', 'processed', 'total', 'created_at', 'updated_at']
+
+
+class TeamMembershipInline(admin.TabularInline):
+    model = TeamMembership
+    extra = 1
+    raw_id_fields = ['user']
+
+@admin.register(Team)
+class TeamAdmin(admin.ModelAdmin):
+    list_display = ['name', 'created_at']
+    search_fields = ['name']
+    inlines = [TeamMembershipInline]
+
+@admin.register(Tenant)
+class TenantAdmin(admin.ModelAdmin):
+    list_display = ['name', 'domain', 'created_at']
+    search_fields = ['name', 'domain']
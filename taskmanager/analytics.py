@@ -0,0 +1,123 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models.functions import Coalesce, TruncDate
+
+from .models import TeamMembership, TenantRole
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the pure-Python rollup returns the same numbers
+    np = None
+
+PERIODS = ('week', 'month')
+GROUP_BYS = ('user', 'group', 'team', 'status')
+PERCENTILES = (50, 90)
+
+
+def period_start(day, period):
+    """Monday of the ISO week, or the first of the month."""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def hours_rows(queryset, start, end):
+    """
+    (user_id, username, status, worked_hours, day) for every task with hours
+    whose day (completion date, else due date) falls in [start, end]. Works on
+    Task and ArchivedTask querysets, so the two can be UNION ALLed.
+    """
+    return (
+        queryset.filter(worked_hours__isnull=False)
+        .annotate(day=Coalesce(TruncDate('completed_at'), 'due_date'))
+        .filter(day__range=(start, end))
+        .values_list('assigned_to_id', 'assigned_to__username', 'status', 'worked_hours', 'day')
+        .order_by()
+    )
+
+
+def label_map(group_by):
+    """user_id -> [labels] for group_by 'group' or 'team'; users in several get counted in each."""
+    if group_by == 'group':
+        pairs = TenantRole.objects.values_list('user_id', 'group__name')
+    else:
+        pairs = TeamMembership.objects.values_list('user_id', 'team__name')
+    labels = defaultdict(list)
+    for user_id, name in pairs:
+        labels[user_id].append(name)
+    return labels
+
+
+def worked_hours(rows, period, group_by):
+    """Roll columnar task rows up into sorted per-(period, label) hour statistics."""
+    labels = label_map(group_by) if group_by in ('group', 'team') else None
+    periods, keys, hours = [], [], []
+    for user_id, username, status, worked, day in rows:
+        bucket = period_start(day, period).isoformat()
+        if labels is None:
+            row_labels = [username if group_by == 'user' else status]
+        else:
+            row_labels = labels.get(user_id, ())
+        for label in row_labels:
+            periods.append(bucket)
+            keys.append(label)
+            hours.append(worked)
+    cells = list(dict.fromkeys(zip(periods, keys)))
+    stats = rollup_numpy(periods, keys, hours, cells) if np is not None else rollup_python(periods, keys, hours)
+    return [
+        {'period': bucket, 'key': key, **stats[(bucket, key)]}
+        for bucket, key in sorted(cells)
+    ]
+
+
+def summary(total, count, percentiles):
+    return {
+        'hours': round(total, 2),
+        'tasks': count,
+        'mean': round(total / count, 2),
+        **{f'p{q}': round(value, 2) for q, value in zip(PERCENTILES, percentiles)},
+    }
+
+
+def percentile(sorted_values, q):
+    # Linear interpolation between closest ranks, numpy's default method
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def rollup_python(periods, keys, hours):
+    groups = defaultdict(list)
+    for cell, value in zip(zip(periods, keys), hours):
+        groups[cell].append(value)
+    stats = {}
+    for cell, values in groups.items():
+        values.sort()
+        stats[cell] = summary(sum(values), len(values), [percentile(values, q) for q in PERCENTILES])
+    return stats
+
+
+def rollup_numpy(periods, keys, hours, cells):
+    """Same result as rollup_python, with the per-group work done in a few array passes."""
+    index = {cell: i for i, cell in enumerate(cells)}
+    codes = np.fromiter((index[cell] for cell in zip(periods, keys)), dtype=np.int64, count=len(hours))
+    values = np.asarray(hours, dtype=float)
+    counts = np.bincount(codes, minlength=len(cells))
+    totals = np.bincount(codes, weights=values, minlength=len(cells))
+    # Sort by cell, then hours: each cell becomes a sorted run starting at starts[i]
+    order = np.lexsort((values, codes))
+    ordered = values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    columns = []
+    for q in PERCENTILES:
+        pos = starts + (counts - 1) * q / 100
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, starts + counts - 1)
+        columns.append(ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo))
+    return {
+        cell: summary(float(totals[i]), int(counts[i]), [float(column[i]) for column in columns])
+        for i, cell in enumerate(cells)
+    }
@@ -0,0 +1,16 @@
+from django.urls import path
+from rest_framework_simplejwt.views import TokenRefreshView
+from taskmanager.api_views import (
+    login_view, throttle_metrics_view, worked_hours_view, TaskListView, TaskSearchView, TaskUpdateView, TaskReportView,
+)
+
+urlpatterns = [
+    path('api/auth/login/', login_view, name='api_login'),
+    path('api/auth/refresh/', TokenRefreshView.as_view(), name='refresh'),
+    path('api/metrics/throttle/', throttle_metrics_view, name='throttle-metrics'),
+    path('api/analytics/hours/', worked_hours_view, name='worked-hours'),
+    path('api/tasks/', TaskListView.as_view(), name='task-list'),
+    path('api/tasks/search/', TaskSearchView.as_view(), name='task-search'),
+    path('api/tasks/<int:id>/', TaskUpdateView.as_view(), name='task-update'),
+    path('api/tasks/<int:id>/report/', TaskReportView.as_view(), name='task-report'),
+]
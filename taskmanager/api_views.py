@@ -0,0 +1,207 @@
+"""
+JSON API views. Kept apart from the Admin Panel views (taskmanager.views) so
+API-only workers (taskmanagement.settings_api) never import forms, messages
+or the panel.
+"""
+from contextlib import nullcontext
+from datetime import date, timedelta
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import generics, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from .models import Task, ArchivedTask, TaskTransition, TeamMembership
+from .tokens import RoleRefreshToken
+from .serializers import TaskSerializer, ArchivedTaskSerializer
+from .permissions import IsAdminOrSuperAdmin, IsTaskOwnerOrAdmin, user_roles, scope_tasks, ADMIN_ROLES
+from .renderers import stream_json_array
+from .search import search_tasks
+from . import analytics, tenancy, throttling
+from .idempotency import idempotent
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def login_view(request):
+    username = request.data.get('username')
+    password = request.data.get('password')
+    allowed, wait = throttling.allow_login(request, username)
+    if not allowed:
+        return Response({'error': 'Too many login attempts'}, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                        headers={'Retry-After': str(wait)})
+    user = authenticate(request, username=username, password=password) if isinstance(username, str) else None
+    # Accounts are shared between tenants; only members of this one may log in here
+    if user and TeamMembership.live().filter(user=user).exists():
+        refresh = RoleRefreshToken.for_user(user)
+        return Response({
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+        })
+    return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrSuperAdmin])
+def throttle_metrics_view(request):
+    return Response(throttling.get_store().metrics())
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrSuperAdmin])
+def worked_hours_view(request):
+    """Worked hours per week or month, by user, group, team or status, over live and archived tasks."""
+    period = request.query_params.get('period', 'week')
+    group_by = request.query_params.get('group_by', 'user')
+    if period not in analytics.PERIODS or group_by not in analytics.GROUP_BYS:
+        return Response({'error': f"period must be one of {', '.join(analytics.PERIODS)}; "
+                                  f"group_by one of {', '.join(analytics.GROUP_BYS)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        end = date.fromisoformat(request.query_params.get('end') or timezone.localdate().isoformat())
+        start = date.fromisoformat(request.query_params.get('start') or (end - timedelta(days=365)).isoformat())
+    except ValueError:
+        return Response({'error': 'start and end must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+    roles = user_roles(request)
+    scope = 'all' if 'SuperAdmin' in roles else f'admin{request.user.id}'
+    key = tenancy.cache_key(f'analytics:hours:{scope}:{period}:{group_by}:{start}:{end}')
+    results = cache.get(key)
+    if results is None:
+        # One UNION ALL query; archived tasks keep their hours in the rollup
+        rows = analytics.hours_rows(scope_tasks(request, Task.objects.all(), roles), start, end).union(
+            analytics.hours_rows(scope_tasks(request, ArchivedTask.objects.all(), roles), start, end), all=True,
+        )
+        results = analytics.worked_hours(rows, period, group_by)
+        cache.set(key, results, getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 300))
+    return Response({'period': period, 'group_by': group_by, 'start': start, 'end': end, 'results': results})
+
+class TaskListView(generics.ListAPIView):
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+    # Columns of the nested assigned_to object
+    USER_COLUMNS = ['assigned_to__id', 'assigned_to__username', 'assigned_to__email']
+
+    @cached_property
+    def sparse_fields(self):
+        """?fields=id,title,... as a list in serializer order, or None for every field."""
+        param = self.request.query_params.get('fields', '')
+        requested = {name.strip() for name in param.split(',') if name.strip()}
+        if not requested:
+            return None
+        unknown = requested.difference(TaskSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError({'fields': f"Unknown field(s): {', '.join(sorted(unknown))}."})
+        return [name for name in TaskSerializer.Meta.fields if name in requested]
+
+    def get_queryset(self):
+        tasks = Task.objects.filter(assigned_to_id=self.request.user.id)
+        fields = self.sparse_fields
+        if fields is None:
+            return tasks.select_related('assigned_to')
+        if 'assigned_to' in fields:
+            columns = [name for name in fields if name != 'assigned_to']
+            return tasks.select_related('assigned_to').only(*columns, *self.USER_COLUMNS)
+        # Flat columns only: plain rows, no model instances and no serializer
+        return tasks.values(*fields)
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'fields': self.sparse_fields}
+
+    def list(self, request, *args, **kwargs):
+        # Stream plain JSON so the first byte goes out before the whole queryset is serialized
+        if self.paginator is not None or not isinstance(request.accepted_renderer, JSONRenderer):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = self.sparse_fields
+        serializer_class = None if fields and 'assigned_to' not in fields else self.get_serializer_class()
+        return StreamingHttpResponse(
+            stream_json_array(queryset, serializer_class, self.get_serializer_context()),
+            content_type='application/json',
+        )
+
+class TaskSearchView(generics.ListAPIView):
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        tasks = scope_tasks(self.request, Task.objects.all())
+        limit = getattr(settings, 'SEARCH_RESULTS_LIMIT', 50)
+        return search_tasks(tasks.select_related('assigned_to'), query)[:limit]
+
+def row_lock():
+    # SQLite ignores SELECT ... FOR UPDATE and a read-then-write transaction
+    # there fails instead of waiting, so only open one where locks exist
+    if connection.features.has_select_for_update:
+        return transaction.atomic()
+    return nullcontext()
+
+class TaskUpdateView(generics.UpdateAPIView):
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated, IsTaskOwnerOrAdmin]
+    lookup_field = 'id'
+
+    def get_queryset(self):
+        # Row is fetched and locked once; the rest of the update works on this instance
+        return Task.objects.select_related('assigned_to').select_for_update(of=('self',))
+
+    @idempotent
+    def update(self, request, *args, **kwargs):
+        data = request.data
+        # Only a well-formed {"status": <known status>} body skips validation; anything else gets its 400 below
+        if (request.headers.get('Prefer') == 'return=minimal' and isinstance(data, dict) and set(data) == {'status'}
+                and isinstance(data['status'], str) and data['status'] in Task.STATUS_CODES):
+            response = self.update_status_only(request, data['status'])
+            if response is not None:
+                return response
+        # Force partial=True for PUT to allow updating only status/report/hours
+        kwargs['partial'] = True
+        with row_lock():
+            return super().update(request, *args, **kwargs)
+
+    def update_status_only(self, request, new_status):
+        """
+        Fast path for owners: UPDATE ... WHERE id = ? AND assigned_to_id = ?
+        AND status = <the one allowed source status>, plus the transition row,
+        with no read and no response body. Completion needs the report/hours
+        validation, so it, admins and anything ambiguous take the full path.
+        """
+        sources = Task.sources_for(new_status)
+        if new_status == 'completed' or len(sources) != 1 or user_roles(request) & ADMIN_ROLES:
+            return None
+        with transaction.atomic():
+            updated = Task.objects.filter(
+                id=self.kwargs['id'], assigned_to_id=request.user.id, status=sources[0],
+            ).update(status=new_status, completed_at=None)
+            if not updated:
+                return None
+            TaskTransition.objects.create(
+                task_id=self.kwargs['id'], user_id=request.user.id,
+                from_status=Task.STATUS_CODES[sources[0]], to_status=Task.STATUS_CODES[new_status],
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT, headers={'Preference-Applied': 'return=minimal'})
+
+class TaskReportView(generics.RetrieveAPIView):
+    serializer_class = TaskSerializer
+    permission_classes = [IsAdminOrSuperAdmin]
+    lookup_field = 'id'
+
+    def get_queryset(self):
+        return scope_tasks(self.request, Task.objects.filter(status='completed').select_related('assigned_to'))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Old completed tasks live in the archive table under the same id
+            archived = get_object_or_404(
+                scope_tasks(request, ArchivedTask.objects.select_related('assigned_to')), id=kwargs['id'],
+            )
+            return Response(ArchivedTaskSerializer(archived, context=self.get_serializer_context()).data)
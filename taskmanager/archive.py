@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import search
+from .models import ArchivedTask, Task
+
+ARCHIVED_FIELDS = [
+    'id', 'tenant_id', 'title', 'description', 'assigned_to_id', 'due_date', 'status',
+    'completion_report', 'worked_hours', 'completed_at',
+]
+
+
+def archivable_tasks(older_than_days=None, now=None):
+    """
+    Completed tasks finished more than `older_than_days` ago. Rows completed
+    before completed_at existed have it empty and are aged by due_date instead.
+    """
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 90)
+    cutoff = (now or timezone.now()) - timedelta(days=older_than_days)
+    return Task.objects.filter(status='completed').filter(
+        Q(completed_at__lt=cutoff) | Q(completed_at__isnull=True, due_date__lt=cutoff.date())
+    )
+
+
+def archive_completed(older_than_days=None, batch_size=None, now=None):
+    """Move archivable tasks into ArchivedTask in batches. Returns the number moved."""
+    batch_size = batch_size or getattr(settings, 'ARCHIVE_BATCH_SIZE', 1000)
+    queryset = archivable_tasks(older_than_days, now).order_by('id')
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.values(*ARCHIVED_FIELDS)[:batch_size])
+            if not rows:
+                break
+            ids = [row['id'] for row in rows]
+            ArchivedTask.objects.bulk_create([ArchivedTask(**row) for row in rows], ignore_conflicts=True)
+            Task.objects.filter(id__in=ids)._raw_delete(queryset.db)
+            search.unindex_tasks(ids)
+        moved += len(rows)
+    return moved
@@ -0,0 +1,24 @@
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from . import tenancy
+from .models import RoleVersion
+
+
+class RoleClaimsAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication without a user lookup. request.user is a TokenUser and
+    request.auth carries the signed role claims; the only per-request check is
+    the (cached) role version, which is bumped on role changes, deactivation,
+    password changes and membership changes. Tokens are only issued to members of the tenant and only
+    work on that tenant, so losing the last membership there revokes them.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        tenant_id = tenancy.active_tenant_id()
+        if tenant_id is not None and validated_token.get('tenant') != tenant_id:
+            raise InvalidToken('Token was issued for another tenant.')
+        if validated_token.get('role_version') != RoleVersion.current(user.id):
+            raise InvalidToken('Token roles are out of date, log in again.')
+        return user
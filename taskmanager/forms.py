@@ -1,16 +1,23 @@
 from django import forms
+from django.conf import settings
 from django.contrib.auth.models import User, Group
-from .models import Task
+from .models import Task, Team, TeamMembership, TenantRole
 
 class UserCreationFormExtended(forms.ModelForm):
     password1 = forms.CharField(widget=forms.PasswordInput, label='Password')
     password2 = forms.CharField(widget=forms.PasswordInput, label='Confirm Password')
     role = forms.ModelChoiceField(queryset=Group.objects.all(), required=False, empty_label="Select Role")
+    team = forms.ModelChoiceField(queryset=Team.objects.none(), required=False, empty_label="Default team")
 
     class Meta:
         model = User
         fields = ['username', 'email']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Built per form so the tenant filter applies to the request's tenant
+        self.fields['team'].queryset = Team.objects.all()
+
     def clean_password2(self):
         password1 = self.cleaned_data.get("password1")
         password2 = self.cleaned_data.get("password2")
@@ -23,14 +30,24 @@ class UserCreationFormExtended(forms.ModelForm):
         user.set_password(self.cleaned_data["password1"])
         if commit:
             user.save()
-        if self.cleaned_data.get('role'):
-            user.groups.add(self.cleaned_data['role'])
+        role = self.cleaned_data.get('role')
+        if role:
+            TenantRole.objects.create(user=user, group=role)
+        # Membership is what places the user in the current tenant, so there is always one
+        team = self.cleaned_data.get('team') or Team.objects.get_or_create(name=settings.DEFAULT_TEAM_NAME)[0]
+        TeamMembership.objects.create(
+            team=team, user=user, role='manager' if role and role.name in ('Admin', 'SuperAdmin') else 'member',
+        )
         return user
 
-class UserRoleForm(forms.ModelForm):
-    class Meta:
-        model = User
-        fields = ['groups']
+class UserRoleForm(forms.Form):
+    # Roles are per tenant: this edits the user's roles in the current tenant only
+    groups = forms.ModelMultipleChoiceField(queryset=Group.objects.all(), required=False, label='Roles')
+
+    def __init__(self, *args, user, **kwargs):
+        roles = TenantRole.objects.filter(user=user).values_list('group_id', flat=True)
+        kwargs.setdefault('initial', {'groups': list(roles)})
+        super().__init__(*args, **kwargs)
 
 class TaskForm(forms.ModelForm):
     class Meta:
@@ -44,6 +61,8 @@ class TaskForm(forms.ModelForm):
     def clean(self):
         cleaned_data = super().clean()
         status = cleaned_data.get('status')
+        if self.instance.pk and status and not Task.can_transition(self.instance.status, status):
+            self.add_error('status', f"Cannot move from {self.instance.get_status_display()} to this status.")
         if status == 'completed':
             report = cleaned_data.get('completion_report')
             hours = cleaned_data.get('worked_hours')
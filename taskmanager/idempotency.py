@@ -0,0 +1,85 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import tenancy
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Response headers worth replaying along with the body
+REPLAYED_HEADERS = ('Preference-Applied', 'Location')
+IN_PROGRESS = 'in_progress'
+
+
+def get_store():
+    return caches[getattr(settings, 'IDEMPOTENCY_CACHE', 'default')]
+
+
+def fingerprint(request):
+    """What the key promises stays the same across retries: method, path and parsed body."""
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def idempotent(view_method):
+    """
+    Honour an Idempotency-Key header on a DRF write handler. The first request
+    with a key runs normally and its response is stored (5xx and 429 excepted);
+    retries with the same key and body get the stored response back without
+    running the handler. Keys are per user and tenant, so they cannot collide
+    across accounts.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'error': f'{HEADER} is too long'}, status=status.HTTP_400_BAD_REQUEST)
+
+        store = get_store()
+        cache_key = tenancy.cache_key(f'idempotency:{request.user.pk}:{key}')
+        request_fingerprint = fingerprint(request)
+        # add() only succeeds for the first request, so concurrent retries cannot both run
+        claim = {'fingerprint': request_fingerprint, 'status': IN_PROGRESS}
+        if not store.add(cache_key, claim, getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60)):
+            stored = store.get(cache_key)
+            if stored is not None:
+                return replay(stored, request_fingerprint)
+            store.set(cache_key, claim, getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60))
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            store.delete(cache_key)
+            raise
+        if response.status_code >= 500 or response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            # Transient failures may be retried for real
+            store.delete(cache_key)
+        else:
+            store.set(cache_key, {
+                'fingerprint': request_fingerprint,
+                'status': response.status_code,
+                'data': response.data,
+                'headers': {name: response[name] for name in REPLAYED_HEADERS if response.has_header(name)},
+            })
+        return response
+
+    return wrapper
+
+
+def replay(stored, request_fingerprint):
+    if stored['fingerprint'] != request_fingerprint:
+        return Response({'error': f'{HEADER} was already used for a different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if stored['status'] == IN_PROGRESS:
+        return Response({'error': 'A request with this key is still being processed'},
+                        status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+    headers = {**stored['headers'], 'Idempotent-Replayed': 'true'}
+    return Response(stored['data'], status=stored['status'], headers=headers)
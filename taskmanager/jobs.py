@@ -0,0 +1,197 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import search
+from .archive import archive_completed
+from .models import ArchivedTask, Job, Task, TaskTransition, TeamMembership, UserTombstone
+
+logger = logging.getLogger(__name__)
+
+# name -> {'func': callable, 'concurrency': int or None, 'max_attempts': int}
+registry = {}
+
+
+def job(name, concurrency=None, max_attempts=5):
+    """Register a handler for jobs called `name`. The handler receives the Job row."""
+    def decorator(func):
+        registry[name] = {'func': func, 'concurrency': concurrency, 'max_attempts': max_attempts}
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, key=None, delay=None):
+    """
+    Queue a job and return it. When `key` is given and a job with that
+    idempotency key already exists, that job is returned instead (a failed
+    one is queued again).
+    """
+    if name not in registry:
+        raise KeyError(f"Unknown job '{name}'")
+    run_at = timezone.now() + (delay or timedelta())
+    if key is not None:
+        existing = Job.objects.filter(idempotency_key=key).first()
+        if existing is not None:
+            if existing.status == 'failed':
+                existing.status = 'queued'
+                existing.attempts = 0
+                existing.run_at = run_at
+                existing.save(update_fields=['status', 'attempts', 'run_at', 'updated_at'])
+            return existing
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                name=name, payload=payload or {}, idempotency_key=key, run_at=run_at,
+                max_attempts=registry[name]['max_attempts'],
+            )
+    except IntegrityError:
+        # Lost a race with another enqueue using the same key
+        return Job.objects.get(idempotency_key=key)
+
+
+def backoff(attempts):
+    base = getattr(settings, 'JOB_RETRY_BACKOFF', 5)
+    cap = getattr(settings, 'JOB_MAX_BACKOFF', 3600)
+    return timedelta(seconds=min(cap, base * 2 ** max(attempts - 1, 0)))
+
+
+def requeue_stale(now=None):
+    """Put back jobs whose worker died while running them."""
+    now = now or timezone.now()
+    timeout = timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT', 600))
+    return Job.objects.filter(status='running', locked_at__lt=now - timeout).update(status='queued', locked_at=None)
+
+
+def claim_next(now=None):
+    """Atomically move the next runnable job to 'running' and return it, or None."""
+    now = now or timezone.now()
+    candidates = Job.objects.filter(status='queued', run_at__lte=now).order_by('run_at', 'id')[:20]
+    for candidate in candidates:
+        spec = registry.get(candidate.name)
+        if spec is None:
+            continue
+        limit = spec['concurrency']
+        if limit is not None and Job.objects.filter(name=candidate.name, status='running').count() >= limit:
+            continue
+        claimed = Job.objects.filter(id=candidate.id, status='queued').update(
+            status='running', locked_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            candidate.refresh_from_db()
+            return candidate
+    return None
+
+
+def run_job(job):
+    try:
+        registry[job.name]['func'](job)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            logger.error("Job %s failed permanently", job)
+        else:
+            job.status = 'queued'
+            job.run_at = timezone.now() + backoff(job.attempts)
+            logger.warning("Job %s failed, retrying at %s", job, job.run_at)
+    else:
+        job.status = 'done'
+        job.last_error = ''
+    job.locked_at = None
+    job.save(update_fields=['status', 'run_at', 'locked_at', 'last_error', 'updated_at'])
+    return job
+
+
+def run_pending(max_jobs=None):
+    """Run queued jobs until none are runnable. Returns how many were run."""
+    requeue_stale()
+    count = 0
+    while max_jobs is None or count < max_jobs:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def delete_in_batches(queryset, job, batch_size=None, report=True):
+    """
+    Delete the rows in `queryset` a batch at a time, one short transaction per
+    batch, adding to the progress on `job` when `report` is set. Nothing
+    references these rows, so each batch is a single DELETE ... WHERE id IN (...)
+    without the collector or per-object signals; for tasks the search index
+    rows are dropped alongside.
+    """
+    batch_size = batch_size or getattr(settings, 'DELETE_BATCH_SIZE', 1000)
+    model = queryset.model
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            model._base_manager.filter(id__in=ids)._raw_delete(queryset.db)
+            if model is Task:
+                search.unindex_tasks(ids)
+        if report:
+            job.report_progress(job.processed + len(ids))
+
+
+@job('delete_user', concurrency=2)
+def delete_user_job(job):
+    user_id = job.payload['user_id']
+    tombstones = UserTombstone.objects.filter(user_id=user_id)
+    if 'tenant_id' in job.payload:  # jobs queued before deletion was per tenant cover every tenant
+        tombstones = tombstones.filter(tenant_id=job.payload['tenant_id'])
+    tenant_ids = list(tombstones.values_list('tenant_id', flat=True))
+    if not tenant_ids:
+        return  # restored since the job was queued
+    # Soft-deleted rows included: by now the user's tasks there are in the trash
+    tasks = Task.all_objects.filter(tenant_id__in=tenant_ids, assigned_to_id=user_id)
+    archived = ArchivedTask.all_objects.filter(tenant_id__in=tenant_ids, assigned_to_id=user_id)
+    job.report_progress(job.processed, job.processed + tasks.count() + archived.count())
+    delete_in_batches(tasks, job)
+    delete_in_batches(archived, job)
+    TeamMembership.objects.filter(tenant_id__in=tenant_ids, user_id=user_id).delete()
+    tombstones.delete()
+    # The account goes with the last tenant it belonged to
+    if not TeamMembership.objects.filter(user_id=user_id).exists():
+        delete_in_batches(TaskTransition.objects.filter(user_id=user_id), job, report=False)
+        User.objects.filter(pk=user_id).delete()
+
+
+def purge_deleted(older_than_days=None, batch_size=None, now=None):
+    """
+    Hard-delete what was soft deleted more than `older_than_days` ago
+    (default SOFT_DELETE_RETENTION_DAYS): tasks and archived tasks in batches,
+    users through a delete_user job per tenant they were deleted from.
+    Returns (rows deleted, user deletions queued).
+    """
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'SOFT_DELETE_RETENTION_DAYS', 30)
+    cutoff = (now or timezone.now()) - timedelta(days=older_than_days)
+    deleted = 0
+    for model in (Task, ArchivedTask):
+        expired = model.all_objects.filter(deleted_at__lt=cutoff)
+        deleted += expired.count()
+        delete_in_batches(expired, None, batch_size, report=False)
+    expired = list(UserTombstone.objects.filter(deleted_at__lt=cutoff).values_list('tenant_id', 'user_id'))
+    for tenant_id, user_id in expired:
+        enqueue('delete_user', {'user_id': user_id, 'tenant_id': tenant_id}, key=f'delete_user:{tenant_id}:{user_id}')
+    return deleted, len(expired)
+
+
+@job('purge_deleted', concurrency=1)
+def purge_deleted_job(job):
+    purge_deleted(older_than_days=job.payload.get('days'))
+
+
+@job('archive_tasks', concurrency=1)
+def archive_tasks_job(job):
+    archive_completed(older_than_days=job.payload.get('days'))
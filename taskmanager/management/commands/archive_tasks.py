@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from taskmanager.archive import archive_completed
+
+
+class Command(BaseCommand):
+    help = 'Move completed tasks older than the threshold into the archive table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Archive tasks completed more than this many days ago (default ARCHIVE_AFTER_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows moved per transaction (default ARCHIVE_BATCH_SIZE).')
+
+    def handle(self, *args, **options):
+        moved = archive_completed(older_than_days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} task(s).'))
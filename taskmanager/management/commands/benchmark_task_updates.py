@@ -0,0 +1,95 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.utils import OperationalError
+
+from taskmanager.models import Task, TaskTransition
+from taskmanager.api_views import row_lock
+
+
+def legacy_update(task_id, user_id, new_status):
+    # What TaskUpdateView did before: groups query, load, save every column
+    User.objects.get(pk=user_id).groups.filter(name__in=['Admin', 'SuperAdmin']).exists()
+    task = Task.objects.select_related('assigned_to').get(id=task_id)
+    task.status = new_status
+    task.save()
+
+
+def update_fields_update(task_id, user_id, new_status):
+    with row_lock():
+        task = Task.objects.select_for_update().get(id=task_id)
+        if task.status != new_status:
+            task.status = new_status
+            task.save(update_fields=['status'])
+
+
+def conditional_update(task_id, user_id, new_status):
+    # Same statements as the TaskUpdateView fast path (the benchmark toggles both ways)
+    source = 'pending' if new_status == 'in_progress' else 'in_progress'
+    with transaction.atomic():
+        if Task.objects.filter(id=task_id, assigned_to_id=user_id, status=source).update(
+                status=new_status, completed_at=None):
+            TaskTransition.objects.create(
+                task_id=task_id, user_id=user_id,
+                from_status=Task.STATUS_CODES[source], to_status=Task.STATUS_CODES[new_status],
+            )
+
+
+PATHS = {
+    'legacy': legacy_update,
+    'update_fields': update_fields_update,
+    'conditional': conditional_update,
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare task status write throughput of the old and new TaskUpdateView paths under contention.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--updates', type=int, default=100, help='Updates per thread.')
+        parser.add_argument('--tasks', type=int, default=20, help='Tasks shared by all threads (fewer = more contention).')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f'bench-{uuid.uuid4().hex[:12]}')
+        try:
+            Task.objects.bulk_create([
+                Task(title=f'Bench {i}', description='Benchmark', assigned_to=user, due_date=date.today())
+                for i in range(options['tasks'])
+            ])
+            task_ids = list(Task.objects.filter(assigned_to=user).values_list('id', flat=True))
+            for name, func in PATHS.items():
+                elapsed, done, failed = self.run_path(func, user.pk, task_ids, options)
+                self.stdout.write(f'{name:>14}: {done / elapsed:9.1f} updates/s ({done} ok, {failed} lock timeouts)')
+        finally:
+            Task.objects.filter(assigned_to=user).delete()
+            TaskTransition.objects.filter(user_id=user.pk).delete()
+            user.delete()
+
+    def run_path(self, func, user_id, task_ids, options):
+        statuses = ['in_progress', 'pending']
+
+        def worker(offset):
+            done = failed = 0
+            try:
+                for i in range(options['updates']):
+                    task_id = task_ids[(offset + i) % len(task_ids)]
+                    try:
+                        func(task_id, user_id, statuses[i % 2])
+                        done += 1
+                    except OperationalError:
+                        failed += 1
+            finally:
+                connection.close()
+            return done, failed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            results = list(pool.map(worker, range(options['threads'])))
+        elapsed = time.perf_counter() - start
+        return elapsed, sum(r[0] for r in results), sum(r[1] for r in results)
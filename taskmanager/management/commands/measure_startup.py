@@ -0,0 +1,55 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: boot the WSGI app and resolve every URL pattern,
+# which imports all view modules just as a worker's first request would.
+PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+rss_kb = None
+try:
+    with open('/proc/self/status') as fh:
+        rss_kb = next(int(line.split()[1]) for line in fh if line.startswith('VmRSS:'))
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == 'darwin' else 1)
+print(json.dumps({'seconds': elapsed, 'rss_kb': rss_kb, 'modules': len(sys.modules)}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure worker boot time and resident memory for each settings profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('profiles', nargs='*',
+                            default=['taskmanagement.settings', 'taskmanagement.settings_api'],
+                            help='Settings modules to compare.')
+        parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per profile (median is reported).')
+
+    def handle(self, *args, **options):
+        for profile in options['profiles']:
+            runs = [self.probe(profile) for _ in range(options['repeat'])]
+            self.stdout.write(
+                f"{profile:>30}: {statistics.median(r['seconds'] for r in runs) * 1000:7.1f} ms, "
+                f"{statistics.median(r['rss_kb'] for r in runs) / 1024:6.1f} MiB RSS, "
+                f"{runs[0]['modules']} modules"
+            )
+
+    def probe(self, profile):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True, check=True,
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
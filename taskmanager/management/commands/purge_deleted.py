@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from taskmanager.jobs import purge_deleted
+
+
+class Command(BaseCommand):
+    help = 'Hard-delete users and tasks soft deleted longer ago than the retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Purge rows deleted more than this many days ago (default SOFT_DELETE_RETENTION_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows deleted per transaction (default DELETE_BATCH_SIZE).')
+
+    def handle(self, *args, **options):
+        deleted, users = purge_deleted(older_than_days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {deleted} task(s); queued {users} user(s) for deletion (python manage.py run_jobs).'
+        ))
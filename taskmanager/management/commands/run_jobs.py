@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from taskmanager import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs. Polls forever unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Stop after running this many jobs.')
+
+    def handle(self, *args, **options):
+        remaining = options['max_jobs']
+        while True:
+            close_old_connections()
+            ran = jobs.run_pending(max_jobs=remaining)
+            if ran:
+                self.stdout.write(f'Ran {ran} job(s).')
+            if remaining is not None:
+                remaining -= ran
+                if remaining <= 0:
+                    break
+            if options['once']:
+                break
+            if not ran:
+                time.sleep(options['sleep'])
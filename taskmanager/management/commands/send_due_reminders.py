@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from taskmanager import reminders
+
+
+class Command(BaseCommand):
+    help = 'Notify owners of tasks that are due soon or overdue, once per reminder window.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=300.0)
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Tasks read per query (default REMINDER_BATCH_SIZE).')
+
+    def handle(self, *args, **options):
+        backend = reminders.get_backend(stream=self.stdout)
+        while True:
+            close_old_connections()
+            sent = reminders.sweep(backend=backend, batch_size=options['batch_size'])
+            self.stderr.write(f"Sent {sent['due_soon']} due-soon and {sent['overdue']} overdue reminder(s).")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,193 @@
+import mimetypes
+import os
+import posixpath
+import stat
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.middleware.gzip import GZipMiddleware
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.utils.text import compress_sequence, compress_string
+from django.views.static import was_modified_since
+
+from . import tenancy
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+def accepted_encodings(header):
+    """Return the content codings the client accepts (q > 0) from Accept-Encoding."""
+    encodings = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            encodings.add(coding)
+    return encodings
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor()
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Negotiated response compression. Prefers brotli when the client accepts it
+    and the brotli package is installed, otherwise gzip. Responses shorter than
+    COMPRESSION_MIN_LENGTH are sent as is; streaming responses are compressed
+    chunk by chunk so they keep streaming.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming and response.is_async:
+            return super().process_response(request, response)
+
+        min_length = getattr(settings, 'COMPRESSION_MIN_LENGTH', 200)
+        if not response.streaming and len(response.content) < min_length:
+            return response
+
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+
+        if response.streaming:
+            if encoding == 'br':
+                response.streaming_content = brotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content,
+                    max_random_bytes=self.max_random_bytes,
+                )
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed_content = brotli.compress(response.content)
+            else:
+                compressed_content = compress_string(
+                    response.content,
+                    max_random_bytes=self.max_random_bytes,
+                )
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class StaticFilesMiddleware:
+    """
+    Serves collected files from STATIC_ROOT ahead of the rest of the stack.
+    Picks the .br/.gz sibling written by collectstatic when the client accepts
+    it, marks manifest-hashed names immutable for STATIC_MAX_AGE, and hands
+    the open file to FileResponse so WSGI servers can use sendfile.
+    """
+
+    VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL and settings.STATIC_URL.startswith('/') else None
+        self.root = settings.STATIC_ROOT
+        self.hashed_names = None
+
+    def __call__(self, request):
+        if self.prefix and self.root and request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def is_hashed(self, name):
+        if self.hashed_names is None:
+            self.hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        return name in self.hashed_names
+
+    def serve(self, request, path):
+        name = posixpath.normpath(unquote(path)).lstrip('/')
+        try:
+            fullpath = safe_join(self.root, name)
+            st = os.stat(fullpath)
+        except (SuspiciousFileOperation, OSError):
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), st.st_mtime):
+            return HttpResponseNotModified()
+
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        served, encoding, has_variants = fullpath, None, False
+        for coding, suffix in self.VARIANTS:
+            if os.path.isfile(fullpath + suffix):
+                has_variants = True
+                if encoding is None and coding in accepted:
+                    served, encoding = fullpath + suffix, coding
+
+        content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+        response = FileResponse(open(served, 'rb'), content_type=content_type)
+        del response.headers['Content-Disposition']
+        response.headers['Last-Modified'] = http_date(st.st_mtime)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if has_variants:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        if self.is_hashed(name):
+            response.headers['Cache-Control'] = f'public, max-age={settings.STATIC_MAX_AGE}, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+
+class TenantMiddleware:
+    """
+    Maps the request host to a Tenant once (cached) and activates it for the
+    rest of the request, so tenant-aware managers filter every query to it.
+    Hosts matching no tenant use DEFAULT_TENANT_DOMAIN, or get a 404 when
+    that is empty.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tenant = tenancy.tenant_for_domain(request.get_host().rsplit(':', 1)[0].lower())
+        if tenant is None:
+            raise Http404('Unknown tenant.')
+        request.tenant = tenant
+        with tenancy.use_tenant(tenant):
+            return self.get_response(request)
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS taskmanager_task_fts '
+        'USING fts5(title, description, completion_report)'
+    )
+    schema_editor.execute(
+        'INSERT INTO taskmanager_task_fts (rowid, title, description, completion_report) '
+        "SELECT id, title, description, COALESCE(completion_report, '') FROM taskmanager_task"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS taskmanager_task_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskmanager', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-18 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskmanager', '0003_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='processed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='total',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.4 on 2026-10-18 23:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_default_team(apps, schema_editor):
+    # One team for today's users: Admins and SuperAdmins manage it, 'User' group members are its plain members
+    Team = apps.get_model('taskmanager', 'Team')
+    TeamMembership = apps.get_model('taskmanager', 'TeamMembership')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    team = Team.objects.create(name=settings.DEFAULT_TEAM_NAME)
+    manager_ids = set(User.objects.filter(groups__name__in=['Admin', 'SuperAdmin']).values_list('pk', flat=True))
+    member_ids = set(User.objects.filter(groups__name='User').values_list('pk', flat=True)) - manager_ids
+    TeamMembership.objects.bulk_create(
+        [TeamMembership(team=team, user_id=pk, role='manager') for pk in sorted(manager_ids)]
+        + [TeamMembership(team=team, user_id=pk, role='member') for pk in sorted(member_ids)]
+    )
+
+
+def remove_default_team(apps, schema_editor):
+    apps.get_model('taskmanager', 'Team').objects.filter(name=settings.DEFAULT_TEAM_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskmanager', '0008_task_reminder'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Team',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TeamMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('member', 'Member'), ('manager', 'Manager')], default='member', max_length=10)),
+                ('team', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='taskmanager.team')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='team_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'role', 'team'], name='taskmanager_user_id_b0590f_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='teammembership',
+            constraint=models.UniqueConstraint(fields=('team', 'user'), name='unique_team_member'),
+        ),
+        migrations.RunPython(create_default_team, remove_default_team),
+    ]
@@ -0,0 +1,141 @@
+# Generated by Django 5.0.4 on 2026-10-18 23:36
+
+import django.db.models.deletion
+import taskmanager.tenancy
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_default_tenant(apps, schema_editor):
+    # Everything that exists today belongs to one tenant, served for unknown hosts
+    apps.get_model('taskmanager', 'Tenant').objects.create(
+        name='Default', domain=settings.DEFAULT_TENANT_DOMAIN or 'localhost',
+    )
+
+
+def assign_default_tenant(apps, schema_editor):
+    tenant = apps.get_model('taskmanager', 'Tenant').objects.get(name='Default')
+    for model in ['ArchivedTask', 'Task', 'Team', 'TeamMembership']:
+        apps.get_model('taskmanager', model).objects.update(tenant=tenant)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskmanager', '0009_team'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tenant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('domain', models.CharField(max_length=253, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(create_default_tenant, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='teammembership',
+            name='unique_team_member',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='taskmanager_status_02d009_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='teammembership',
+            name='taskmanager_user_id_b0590f_idx',
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='tenant',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to='taskmanager.tenant'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='taskmanager.tenant'),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='teams', to='taskmanager.tenant'),
+        ),
+        migrations.AddField(
+            model_name='teammembership',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taskmanager.tenant'),
+        ),
+        migrations.RunPython(assign_default_tenant, migrations.RunPython.noop),
+        # NOT NULL first, without a default: the column rebuild would otherwise evaluate
+        # current_tenant_id, which queries the live Tenant model, to fill the (already backfilled) rows
+        migrations.AlterField(
+            model_name='archivedtask',
+            name='tenant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to='taskmanager.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='taskmanager.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='teams', to='taskmanager.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='teammembership',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taskmanager.tenant'),
+        ),
+        # The default only applies to new rows, in Python
+        migrations.AlterField(
+            model_name='archivedtask',
+            name='tenant',
+            field=models.ForeignKey(default=taskmanager.tenancy.current_tenant_id, on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to='taskmanager.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, default=taskmanager.tenancy.current_tenant_id, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='taskmanager.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, default=taskmanager.tenancy.current_tenant_id, on_delete=django.db.models.deletion.CASCADE, related_name='teams', to='taskmanager.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='teammembership',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, default=taskmanager.tenancy.current_tenant_id, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taskmanager.tenant'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['tenant', 'status', 'due_date'], name='taskmanager_tenant__6d16ab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['tenant', 'assigned_to'], name='taskmanager_tenant__fb6020_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teammembership',
+            index=models.Index(fields=['tenant', 'user', 'role', 'team'], name='taskmanager_tenant__ebeb6a_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='team',
+            constraint=models.UniqueConstraint(fields=('tenant', 'name'), name='unique_team_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='teammembership',
+            constraint=models.UniqueConstraint(fields=('tenant', 'team', 'user'), name='unique_team_member'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.0.4 on 2026-10-18 23:53
+
+import django.db.models.deletion
+import django.utils.timezone
+import taskmanager.tenancy
+from django.conf import settings
+from django.db import migrations, models
+
+
+def tombstone_pending_deletions(apps, schema_editor):
+    # delete_user jobs queued before soft delete only run for users with a tombstone;
+    # they predate other tenants, so the users are deleted from the default one
+    Job = apps.get_model('taskmanager', 'Job')
+    UserTombstone = apps.get_model('taskmanager', 'UserTombstone')
+    tenant = apps.get_model('taskmanager', 'Tenant').objects.get(name='Default')
+    for job in Job.objects.filter(name='delete_user', status__in=['queued', 'running']):
+        UserTombstone.objects.get_or_create(
+            tenant=tenant, user_id=job.payload['user_id'],
+            defaults={'deleted_at': job.created_at, 'was_active': True},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('taskmanager', '0010_tenant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('was_active', models.BooleanField(default=True)),
+                ('tenant', models.ForeignKey(db_index=False, default=taskmanager.tenancy.current_tenant_id, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taskmanager.tenant')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'user'), name='unique_user_tombstone')],
+            },
+        ),
+        migrations.RunPython(tombstone_pending_deletions, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='taskmanager_tenant__6d16ab_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='taskmanager_tenant__fb6020_idx',
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='archivedtask_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['tenant', 'status', 'due_date'], name='task_live_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['tenant', 'assigned_to'], name='task_live_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='task_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertombstone',
+            index=models.Index(fields=['deleted_at'], name='taskmanager_deleted_36d087_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.4 on 2026-10-19 00:16
+
+import django.db.models.deletion
+import taskmanager.tenancy
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_group_roles(apps, schema_editor):
+    # Roles were global groups that only applied where the user was a member, Admin and
+    # SuperAdmin only where they managed a team; keep exactly those, now one row per tenant
+    TeamMembership = apps.get_model('taskmanager', 'TeamMembership')
+    TenantRole = apps.get_model('taskmanager', 'TenantRole')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    groups = {}
+    for user_id, group_id, name in User.groups.through.objects.values_list('user_id', 'group_id', 'group__name'):
+        groups.setdefault(user_id, []).append((group_id, name))
+    managing = set()
+    tenants = set()
+    for tenant_id, user_id, role in TeamMembership.objects.values_list('tenant_id', 'user_id', 'role'):
+        tenants.add((tenant_id, user_id))
+        if role == 'manager':
+            managing.add((tenant_id, user_id))
+    TenantRole.objects.bulk_create([
+        TenantRole(tenant_id=tenant_id, user_id=user_id, group_id=group_id)
+        for tenant_id, user_id in sorted(tenants)
+        for group_id, name in groups.get(user_id, [])
+        if name not in ('Admin', 'SuperAdmin') or (tenant_id, user_id) in managing
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('taskmanager', '0011_soft_delete'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantRole',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='auth.group')),
+                ('tenant', models.ForeignKey(db_index=False, default=taskmanager.tenancy.current_tenant_id, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taskmanager.tenant')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='roles', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='tenantrole',
+            constraint=models.UniqueConstraint(fields=('tenant', 'user', 'group'), name='unique_tenant_role'),
+        ),
+        migrations.RunPython(copy_group_roles, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,34 @@
 #from django.db import models
 # Create your models here.
 
-from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Exists, F, Max, Min, OuterRef, Q
 from django.contrib.auth.models import User, Group
+from django.utils import timezone
+
+from . import tenancy
+
+
+class Tenant(models.Model):
+    """A client organization. Requests are mapped to one by host name."""
+    name = models.CharField(max_length=100, unique=True)
+    domain = models.CharField(max_length=253, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class LiveManager(tenancy.TenantManager):
+    """
+    Default manager of soft-deletable models: the tenant filter plus
+    deleted_at IS NULL, which also matches the partial indexes' condition.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 
 class Task(models.Model):
@@ -11,7 +37,18 @@ class Task(models.Model):
         ('in_progress', 'In Progress'),
         ('completed', 'Completed'),
     ]
+    # Small-int codes stored in the transition log
+    STATUS_CODES = {'pending': 0, 'in_progress': 1, 'completed': 2}
+    # Allowed moves; staying in the same status is always allowed
+    TRANSITIONS = {
+        'pending': {'in_progress'},
+        'in_progress': {'completed'},
+        'completed': set(),
+    }
 
+    # Leads every composite index below, so each tenant's rows are one contiguous index range
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='tasks', db_index=False,
+                               default=tenancy.current_tenant_id)
     title = models.CharField(max_length=200)
     description = models.TextField()
     assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, related_name='assigned_tasks')
@@ -19,13 +56,443 @@ class Task(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     completion_report = models.TextField(blank=True, null=True)
     worked_hours = models.FloatField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    # Set when the task is moved to the trash; purged after SOFT_DELETE_RETENTION_DAYS
+    deleted_at = models.DateTimeField(blank=True, null=True)
+
+    objects = LiveManager()
+    all_objects = tenancy.TenantManager()
+
+    class Meta:
+        # Live rows only: deleted ones never bloat the indexes the API reads through
+        indexes = [
+            models.Index(fields=['tenant', 'status', 'due_date'], name='task_live_status_due_idx',
+                         condition=Q(deleted_at__isnull=True)),
+            models.Index(fields=['tenant', 'assigned_to'], name='task_live_assignee_idx',
+                         condition=Q(deleted_at__isnull=True)),
+            models.Index(fields=['deleted_at'], name='task_deleted_idx', condition=Q(deleted_at__isnull=False)),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.assigned_to.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    @classmethod
+    def can_transition(cls, old_status, new_status):
+        return old_status == new_status or new_status in cls.TRANSITIONS.get(old_status, ())
+
+    @classmethod
+    def sources_for(cls, new_status):
+        """Statuses a task may move to `new_status` from."""
+        return [old for old, targets in cls.TRANSITIONS.items() if new_status in targets]
+
+    def save(self, *args, **kwargs):
+        # completed_at drives archival, keep it in step with status
+        if self.status == 'completed':
+            if self.completed_at is None:
+                self.completed_at = timezone.now()
+        else:
+            self.completed_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'completed_at'}
+        adding = self._state.adding
+        previous = getattr(self, '_loaded_status', None)
+        status_written = update_fields is None or 'status' in update_fields
+        log = status_written and (adding or (previous is not None and previous != self.status))
+        # The transition row commits or rolls back together with the task row
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+            if log:
+                TaskTransition.objects.create(
+                    task_id=self.pk, user_id=self.assigned_to_id,
+                    from_status=None if adding else self.STATUS_CODES[previous],
+                    to_status=self.STATUS_CODES[self.status],
+                )
+        self._loaded_status = self.status
+
+    def soft_delete(self, when=None):
+        self.deleted_at = when or timezone.now()
+        self.save(update_fields=['deleted_at'])
+
+    def restore(self):
+        self.deleted_at = None
+        self.save(update_fields=['deleted_at'])
+
+
+class TaskTransitionQuerySet(models.QuerySet):
+    def cycle_times(self):
+        """
+        Average seconds from first moving to in_progress until completion,
+        per user: {user_id: (average_seconds, completed_task_count)}. One
+        query grouped per (user, task) over the (user, to_status, created_at)
+        index yields each task's start and finish; the per-user averages are
+        summed up from those rows in Python.
+        """
+        in_progress, completed = Task.STATUS_CODES['in_progress'], Task.STATUS_CODES['completed']
+        per_task = (
+            self.filter(to_status__in=[in_progress, completed])
+            .values('user_id', 'task_id')
+            .annotate(
+                started=Min('created_at', filter=Q(to_status=in_progress)),
+                finished=Max('created_at', filter=Q(to_status=completed)),
+            )
+            .filter(started__isnull=False, finished__isnull=False)
+        )
+        totals = {}
+        for row in per_task:
+            seconds, count = totals.get(row['user_id'], (0.0, 0))
+            totals[row['user_id']] = (seconds + (row['finished'] - row['started']).total_seconds(), count + 1)
+        return {user_id: (seconds / count, count) for user_id, (seconds, count) in totals.items()}
+
+
+class TaskTransition(models.Model):
+    """
+    Append-only status history. Rows are small on purpose: ids, two status
+    codes and a timestamp. No foreign key constraints, so tasks and users can
+    be removed or archived in bulk without touching this table.
+    """
+    task = models.ForeignKey(Task, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                             related_name='transitions')
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                             related_name='+')
+    from_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    to_status = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = TaskTransitionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'created_at']),
+            models.Index(fields=['user', 'to_status', 'created_at']),
+        ]
+
+
+class ArchivedTask(models.Model):
+    # Same columns as Task; id is the original task id so report links keep working
+    id = models.BigIntegerField(primary_key=True)
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='archived_tasks',
+                               default=tenancy.current_tenant_id)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_tasks')
+    due_date = models.DateField()
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES, default='completed')
+    completion_report = models.TextField(blank=True, null=True)
+    worked_hours = models.FloatField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    deleted_at = models.DateTimeField(blank=True, null=True)
+
+    objects = LiveManager()
+    all_objects = tenancy.TenantManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at'], name='archivedtask_deleted_idx', condition=Q(deleted_at__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f"{self.title} - {self.assigned_to.username} (archived)"
+
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    idempotency_key = models.CharField(max_length=200, unique=True, blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    processed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_at'])]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    def report_progress(self, processed, total=None):
+        self.processed = processed
+        if total is not None:
+            self.total = total
+        Job.objects.filter(pk=self.pk).update(processed=self.processed, total=self.total, updated_at=timezone.now())
+
+
+class TaskReminder(models.Model):
+    """
+    One row per task, reminder kind and window. The unique constraint is what
+    keeps a task from being notified twice in the same window, even with
+    several schedulers running.
+    """
+    KIND_CHOICES = [
+        ('due_soon', 'Due soon'),
+        ('overdue', 'Overdue'),
+    ]
+
+    task = models.ForeignKey(Task, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                             related_name='reminders')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    window = models.DateField()
+    run_id = models.UUIDField()
+    sent_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['task', 'kind', 'window'], name='unique_task_reminder')]
+        indexes = [models.Index(fields=['run_id']), models.Index(fields=['window'])]
+
+
+class RoleVersion(models.Model):
+    """
+    Per-user counter embedded in JWTs next to the role claims. Bumping it
+    revokes every token issued with the old roles.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='role_version')
+    version = models.PositiveIntegerField(default=0)
+
+    @staticmethod
+    def cache_key(user_id):
+        return f'role_version:{user_id}'
+
+    @classmethod
+    def current(cls, user_id):
+        key = cls.cache_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            version = cls.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+            cache.set(key, version, getattr(settings, 'ROLE_VERSION_CACHE_TIMEOUT', 60))
+        return version
+
+    @classmethod
+    def bump(cls, user_id):
+        if not cls.objects.filter(user_id=user_id).update(version=F('version') + 1):
+            cls.objects.get_or_create(user_id=user_id, defaults={'version': 1})
+        cache.delete(cls.cache_key(user_id))
+
+
+class UserTombstone(models.Model):
+    """
+    Marks a user deleted from one tenant. Their tasks there are soft deleted
+    with the same timestamp, so restoring brings back exactly those rows, and
+    the account is deactivated once no other tenant still has them. The purge
+    job removes the user from the tenant after the retention period, and the
+    account with the last tenant it belonged to.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='+', db_index=False,
+                               default=tenancy.current_tenant_id)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tombstones', db_index=False)
+    deleted_at = models.DateTimeField(default=timezone.now)
+    was_active = models.BooleanField(default=True)
+
+    objects = tenancy.TenantManager()
 
-from django.db.models.signals import post_migrate
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['tenant', 'user'], name='unique_user_tombstone')]
+        indexes = [models.Index(fields=['deleted_at'])]
+
+    def __str__(self):
+        return f"{self.user_id} deleted from {self.tenant_id} {self.deleted_at:%Y-%m-%d}"
+
+    @classmethod
+    def delete_user(cls, user, when=None):
+        """
+        Remove `user` from the current tenant: soft delete their tasks there (one
+        UPDATE per table, no cascade) and deactivate the account unless another
+        tenant still has them.
+        """
+        when = when or timezone.now()
+        tenant_id = tenancy.current_tenant_id()
+        with transaction.atomic():
+            tombstone = cls.objects.create(tenant_id=tenant_id, user=user, deleted_at=when, was_active=user.is_active)
+            for model in (Task, ArchivedTask):
+                model._base_manager.filter(
+                    tenant_id=tenant_id, assigned_to=user, deleted_at__isnull=True,
+                ).update(deleted_at=when)
+            if not TeamMembership.live(all_tenants=True).filter(user=user).exists():
+                User.objects.filter(pk=user.pk).update(is_active=False)
+                user.is_active = False
+        RoleVersion.bump(user.pk)
+        return tombstone
+
+    def restore(self):
+        """Undo delete_user; tasks deleted on their own before it stay deleted."""
+        with transaction.atomic():
+            for model in (Task, ArchivedTask):
+                model._base_manager.filter(
+                    tenant_id=self.tenant_id, assigned_to_id=self.user_id, deleted_at=self.deleted_at,
+                ).update(deleted_at=None)
+            # Back in a tenant, so active again unless it was already inactive when deleted
+            if self.was_active:
+                User.objects.filter(pk=self.user_id).update(is_active=True)
+            self.delete()
+
+
+class Team(models.Model):
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='teams', db_index=False,
+                               default=tenancy.current_tenant_id)
+    name = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = tenancy.TenantManager()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['tenant', 'name'], name='unique_team_name')]
+
+    def __str__(self):
+        return self.name
+
+
+class TeamMembership(models.Model):
+    """
+    Who belongs to which team. Admins see the tasks of the plain members of
+    the teams they manage, not those of co-managers; SuperAdmins see everything.
+    """
+    ROLE_CHOICES = [
+        ('member', 'Member'),
+        ('manager', 'Manager'),
+    ]
+
+    # The composite indexes below lead with tenant, then each FK, so no single-column ones.
+    # tenant always equals team.tenant; it is repeated here so lookups never join Team.
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='+', db_index=False,
+                               default=tenancy.current_tenant_id)
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='memberships', db_index=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='team_memberships', db_index=False)
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='member')
+
+    objects = tenancy.TenantManager()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['tenant', 'team', 'user'], name='unique_team_member')]
+        # (tenant, team, user) answers "members of these teams", (tenant, user, role, team) "teams this admin manages"
+        indexes = [models.Index(fields=['tenant', 'user', 'role', 'team'])]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.team_id} ({self.role})"
+
+    def save(self, *args, **kwargs):
+        self.tenant_id = self.team.tenant_id
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def live(cls, all_tenants=False):
+        """Memberships in the current tenant (or all of them), minus users deleted from the membership's tenant."""
+        memberships = cls._base_manager.all() if all_tenants else cls.objects.all()
+        deleted = UserTombstone._base_manager.filter(tenant_id=OuterRef('tenant_id'), user_id=OuterRef('user_id'))
+        return memberships.filter(~Exists(deleted))
+
+    @staticmethod
+    def cache_key(user_id, tenant_id=None):
+        return tenancy.cache_key(f'team_scope:{user_id}', tenant_id)
+
+    @classmethod
+    def scope(cls, user_id):
+        """
+        (ids of the teams `user_id` manages, frozenset of their plain members'
+        ids) in the current tenant, cached under that tenant's namespace.
+        Co-managers, the user included, are not in the set.
+        """
+        tenant_id = tenancy.current_tenant_id()
+        key = cls.cache_key(user_id, tenant_id)
+        scope = cache.get(key)
+        if scope is None:
+            memberships = cls._base_manager.filter(tenant_id=tenant_id)
+            team_ids = list(memberships.filter(user_id=user_id, role='manager').values_list('team_id', flat=True))
+            user_ids = frozenset(
+                memberships.filter(team_id__in=team_ids, role='member').values_list('user_id', flat=True)
+            )
+            scope = (team_ids, user_ids)
+            cache.set(key, scope, getattr(settings, 'TEAM_SCOPE_CACHE_TIMEOUT', 300))
+        return scope
+
+    @classmethod
+    def managed_team_ids(cls, user_id):
+        return cls.scope(user_id)[0]
+
+    @classmethod
+    def visible_user_ids(cls, user_id):
+        return cls.scope(user_id)[1]
+
+    @classmethod
+    def member_ids(cls, team_ids):
+        """Subquery of the teams' plain member ids (managers excluded), without a join."""
+        return cls.objects.filter(team_id__in=team_ids, role='member').values('user_id')
+
+    @classmethod
+    def set_manager(cls, user, manager):
+        """Make `user` a manager (or a plain member) of each of their teams in the current tenant."""
+        role = 'manager' if manager else 'member'
+        # Saved one by one so each team's cached scopes are invalidated
+        for membership in cls.objects.filter(user=user).exclude(role=role).select_related('team'):
+            membership.role = role
+            membership.save(update_fields=['role'])
+
+    @classmethod
+    def invalidate(cls, tenant_id, team_id, *user_ids):
+        managers = cls._base_manager.filter(tenant_id=tenant_id, team_id=team_id, role='manager')
+        user_ids = {*managers.values_list('user_id', flat=True), *user_ids}
+        cache.delete_many([cls.cache_key(user_id, tenant_id) for user_id in user_ids])
+
+class TenantRole(models.Model):
+    """
+    A user's role in one tenant, named by one of the auth groups (SuperAdmin,
+    Admin, User). Accounts are shared between tenants but roles are not, so
+    granting or revoking one never reaches another tenant.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='+', db_index=False,
+                               default=tenancy.current_tenant_id)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='roles', db_index=False)
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='+', db_index=False)
+
+    objects = tenancy.TenantManager()
+
+    class Meta:
+        # Also the index behind "this user's roles in this tenant"
+        constraints = [models.UniqueConstraint(fields=['tenant', 'user', 'group'], name='unique_tenant_role')]
+
+    def __str__(self):
+        return f"{self.user_id} is {self.group_id} in {self.tenant_id}"
+
+    @classmethod
+    def names(cls, user):
+        """Names of `user`'s roles in the current tenant."""
+        return set(cls.objects.filter(user=user).values_list('group__name', flat=True))
+
+    @classmethod
+    def set_roles(cls, user, groups):
+        """Make `groups` the user's roles in the current tenant; other tenants are left alone."""
+        current = {role.group_id: role for role in cls.objects.filter(user=user)}
+        wanted = {group.pk: group for group in groups}
+        # One row at a time so each change bumps the role version
+        with transaction.atomic():
+            for group_id, role in current.items():
+                if group_id not in wanted:
+                    role.delete()
+            for group_id, group in wanted.items():
+                if group_id not in current:
+                    cls.objects.create(user=user, group=group)
+
+from django.db.models.signals import post_init, post_migrate, post_save, post_delete
 from django.dispatch import receiver
+from . import search
 
 
 @receiver(post_migrate)
@@ -33,4 +500,64 @@ def create_groups(sender, **kwargs):
     if sender.name == 'taskmanager':
         Group.objects.get_or_create(name='SuperAdmin')
         Group.objects.get_or_create(name='Admin')
-        Group.objects.get_or_create(name='User')
\ No newline at end of file
+        Group.objects.get_or_create(name='User')
+
+
+# Keep the full-text index in step with the task table
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, update_fields=None, **kwargs):
+    search.index_task(instance, update_fields)
+
+
+@receiver(post_delete, sender=Task)
+def unindex_task(sender, instance, **kwargs):
+    search.unindex_tasks([instance.pk])
+
+
+# Host lookups are cached, hits and misses alike
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def invalidate_tenant_domain(sender, instance, **kwargs):
+    cache.delete(tenancy.domain_cache_key(instance.domain))
+
+
+# Membership changes invalidate the cached scope of the team's managers
+@receiver(post_save, sender=TeamMembership)
+@receiver(post_delete, sender=TeamMembership)
+def invalidate_team_scope(sender, instance, **kwargs):
+    TeamMembership.invalidate(instance.tenant_id, instance.team_id, instance.user_id)
+
+
+def _deleting_user(origin):
+    # Nothing to revoke when the user itself (an instance or a queryset) is being deleted
+    return getattr(origin, 'model', type(origin)) is User
+
+
+# Roles only apply where the user is a member, so leaving a team revokes tokens too
+@receiver(post_delete, sender=TeamMembership)
+def bump_membership_role_version(sender, instance, origin=None, **kwargs):
+    if not _deleting_user(origin):
+        RoleVersion.bump(instance.user_id)
+
+
+# Tokens never load the user, so deactivation and password changes revoke them through the role version
+@receiver(post_init, sender=User)
+def remember_credentials(sender, instance, **kwargs):
+    # Deferred fields stay None rather than costing a query per loaded user
+    instance._credentials = (instance.__dict__.get('is_active'), instance.__dict__.get('password'))
+
+
+@receiver(post_save, sender=User)
+def bump_role_version_on_credentials(sender, instance, created, **kwargs):
+    credentials = (instance.is_active, instance.password)
+    if not created and None not in instance._credentials and credentials != instance._credentials:
+        RoleVersion.bump(instance.pk)
+    instance._credentials = credentials
+
+
+# Role changes invalidate the role claims in outstanding tokens
+@receiver(post_save, sender=TenantRole)
+@receiver(post_delete, sender=TenantRole)
+def bump_role_version(sender, instance, origin=None, **kwargs):
+    if not _deleting_user(origin):
+        RoleVersion.bump(instance.user_id)
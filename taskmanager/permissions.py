@@ -1,14 +1,50 @@
 from rest_framework.permissions import BasePermission
-from django.contrib.auth.models import Group
+from .models import TeamMembership, TenantRole
+
+ADMIN_ROLES = {'Admin', 'SuperAdmin'}
+
+
+def tenant_roles(user):
+    """The user's roles in the current tenant; none unless they are still a member there."""
+    if not TeamMembership.live().filter(user=user).exists():
+        return set()
+    return TenantRole.names(user)
+
+
+def user_roles(request):
+    # Signed claims from the JWT when present, otherwise the user's roles in this tenant
+    token = getattr(request, 'auth', None)
+    if token is not None and 'roles' in token:
+        return set(token['roles'])
+    return tenant_roles(request.user)
+
+
+def scope_tasks(request, queryset, roles=None):
+    """
+    Limit a Task queryset to what the user may see: everything for SuperAdmins,
+    their managed teams' members for Admins, their own tasks otherwise.
+    """
+    roles = user_roles(request) if roles is None else roles
+    if 'SuperAdmin' in roles:
+        return queryset
+    if 'Admin' in roles:
+        team_ids = TeamMembership.managed_team_ids(request.user.id)
+        return queryset.filter(assigned_to_id__in=TeamMembership.member_ids(team_ids))
+    return queryset.filter(assigned_to_id=request.user.id)
+
+
+def can_manage_user(request, user_id, roles=None):
+    roles = user_roles(request) if roles is None else roles
+    if 'SuperAdmin' in roles:
+        return True
+    return 'Admin' in roles and user_id in TeamMembership.visible_user_ids(request.user.id)
 
 class IsAdminOrSuperAdmin(BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and (
-            request.user.groups.filter(name__in=['Admin', 'SuperAdmin']).exists()
-        )
+        return request.user.is_authenticated and bool(user_roles(request) & ADMIN_ROLES)
 
 class IsTaskOwnerOrAdmin(BasePermission):
     def has_object_permission(self, request, view, obj):
-        if request.user.groups.filter(name__in=['Admin', 'SuperAdmin']).exists():
+        if obj.assigned_to_id == request.user.id:
             return True
-        return obj.assigned_to == request.user
\ No newline at end of file
+        return can_manage_user(request, obj.assigned_to_id)
@@ -0,0 +1,126 @@
+import json
+import sys
+import uuid
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task, TaskReminder, Tenant
+
+OPEN_STATUSES = ['pending', 'in_progress']
+
+
+class ConsoleBackend:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, kind, tasks):
+        for task in tasks:
+            self.stream.write(f'[{kind}] #{task.pk} {task.title} due {task.due_date} -> {task.assigned_to.username}\n')
+
+
+class FileBackend:
+    """Appends one JSON line per notification to REMINDER_FILE_PATH."""
+
+    def __init__(self, path=None, **kwargs):
+        self.path = path or settings.REMINDER_FILE_PATH
+
+    def send(self, kind, tasks):
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            for task in tasks:
+                fh.write(json.dumps({
+                    'kind': kind, 'task_id': task.pk, 'title': task.title,
+                    'due_date': task.due_date.isoformat(), 'user_id': task.assigned_to_id,
+                }) + '\n')
+
+
+class EmailBackend:
+    def __init__(self, **kwargs):
+        pass
+
+    def send(self, kind, tasks):
+        subject = 'Task overdue' if kind == 'overdue' else 'Task due soon'
+        for task in tasks:
+            if task.assigned_to.email:
+                send_mail(subject, f'"{task.title}" is due on {task.due_date}.', None,
+                          [task.assigned_to.email], fail_silently=True)
+
+
+def get_backend(**kwargs):
+    return import_string(getattr(settings, 'REMINDER_BACKEND', 'taskmanager.reminders.ConsoleBackend'))(**kwargs)
+
+
+def window_start(day, window_days=None):
+    """First day of the dedup window containing `day`."""
+    window_days = window_days or getattr(settings, 'REMINDER_WINDOW_DAYS', 1)
+    return day - timedelta(days=day.toordinal() % window_days)
+
+
+def due_tasks(tenant_id, status, date_range, kind, window):
+    """
+    Open tasks of one tenant with `status` whose due_date falls in `date_range`
+    and that have no reminder of `kind` in `window`: equalities on tenant and
+    status plus a range on due_date, so it walks the (tenant, status, due_date)
+    index.
+    """
+    already_sent = TaskReminder.objects.filter(task_id=OuterRef('pk'), kind=kind, window=window)
+    return (
+        Task.objects.filter(tenant_id=tenant_id, status=status, due_date__range=date_range)
+        .exclude(Exists(already_sent))
+        .order_by('due_date', 'id')
+    )
+
+
+def sweep(backend=None, now=None, batch_size=None):
+    """Notify every due-soon or overdue task once per window. Returns {kind: count}."""
+    backend = backend or get_backend()
+    batch_size = batch_size or getattr(settings, 'REMINDER_BATCH_SIZE', 500)
+    today = timezone.localdate(now)
+    window = window_start(today)
+    soon_days = getattr(settings, 'REMINDER_DUE_SOON_DAYS', 2)
+    ranges = {
+        'overdue': (date.min, today - timedelta(days=1)),
+        'due_soon': (today, today + timedelta(days=soon_days)),
+    }
+    # Rows from earlier windows no longer dedupe anything
+    TaskReminder.objects.filter(window__lt=window).delete()
+    sent = {kind: 0 for kind in ranges}
+    tenant_ids = list(Tenant.objects.values_list('id', flat=True))
+    for kind, date_range in ranges.items():
+        for tenant_id in tenant_ids:
+            for status in OPEN_STATUSES:
+                for batch in keyset_batches(due_tasks(tenant_id, status, date_range, kind, window), batch_size):
+                    claimed = claim(batch, kind, window)
+                    if claimed:
+                        backend.send(kind, claimed)
+                        sent[kind] += len(claimed)
+    return sent
+
+
+def keyset_batches(queryset, batch_size):
+    """Yield lists of tasks ordered by (due_date, id), one indexed range query per batch."""
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(Q(due_date__gt=last[0]) | Q(due_date=last[0], id__gt=last[1]))
+        batch = list(page.select_related('assigned_to')[:batch_size])
+        if not batch:
+            return
+        last = (batch[-1].due_date, batch[-1].pk)
+        yield batch
+
+
+def claim(tasks, kind, window):
+    """Insert reminder rows for `tasks`; return the tasks this run won (others were taken concurrently)."""
+    run_id = uuid.uuid4()
+    TaskReminder.objects.bulk_create(
+        [TaskReminder(task_id=task.pk, kind=kind, window=window, run_id=run_id) for task in tasks],
+        ignore_conflicts=True,
+    )
+    won = set(TaskReminder.objects.filter(run_id=run_id).values_list('task_id', flat=True))
+    return [task for task in tasks if task.pk in won]
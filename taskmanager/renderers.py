@@ -0,0 +1,26 @@
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+
+def stream_json_array(queryset, serializer_class=None, context=None, chunk_size=None):
+    """
+    Yield a JSON array of serialized objects piece by piece. The queryset is
+    read with .iterator() so only one chunk of rows is held in memory at a time.
+    Without a serializer_class the rows are rendered as they are, e.g. the
+    dicts of a .values() queryset.
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'STREAM_CHUNK_SIZE', 500)
+    renderer = JSONRenderer()
+    separator = b''
+    batch = []
+    yield b'['
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        batch.append(renderer.render(obj if serializer_class is None else serializer_class(obj, context=context).data))
+        if len(batch) >= chunk_size:
+            yield separator + b','.join(batch)
+            separator = b','
+            batch = []
+    if batch:
+        yield separator + b','.join(batch)
+    yield b']'
@@ -0,0 +1,66 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = 'taskmanager_task_fts'
+# bm25() column weights for title, description, completion_report
+FTS_WEIGHTS = (10.0, 1.0, 1.0)
+FTS_FIELDS = {'title', 'description', 'completion_report'}
+
+word_re = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def build_match(query):
+    """Turn free text into an FTS5 MATCH expression of quoted prefix terms."""
+    return ' '.join(f'"{word}"*' for word in word_re.findall(query))
+
+
+def index_task(task, update_fields=None):
+    if not fts_enabled():
+        return
+    if update_fields is not None and not FTS_FIELDS.intersection(update_fields):
+        return
+    with connection.cursor() as cursor:
+        # Single statement so concurrent saves of the same task cannot collide on rowid
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, description, completion_report) '
+            'VALUES (%s, %s, %s, %s)',
+            [task.pk, task.title, task.description, task.completion_report or ''],
+        )
+
+
+def unindex_tasks(task_ids):
+    task_ids = list(task_ids)
+    if not fts_enabled() or not task_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(task_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', task_ids)
+
+
+def search_tasks(queryset, query):
+    """
+    Filter a Task queryset down to rows matching `query`, best matches first.
+    Uses the FTS5 index on SQLite and falls back to icontains elsewhere.
+    """
+    match = build_match(query)
+    if not match:
+        return queryset.none()
+    if not fts_enabled():
+        return queryset.filter(
+            Q(title__icontains=query) | Q(description__icontains=query) | Q(completion_report__icontains=query)
+        )
+    table = queryset.model._meta.db_table
+    weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+    return queryset.extra(
+        select={'rank': f'bm25({FTS_TABLE}, {weights})'},
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+        order_by=['rank'],
+    )
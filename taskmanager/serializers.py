@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Task
+from .models import Task, ArchivedTask
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -9,7 +9,18 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email']
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Keeps only the fields listed in context['fields'] (a ?fields= sparse fieldset), when given."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        wanted = self.context.get('fields')
+        if wanted is not None:
+            fields = {name: field for name, field in fields.items() if name in wanted}
+        return fields
+
+
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     assigned_to = UserSerializer(read_only=True)
 
     class Meta:
@@ -21,6 +32,8 @@ class TaskSerializer(serializers.ModelSerializer):
     def validate(self, data):
         errors = {}
         status = data.get('status')
+        if self.instance is not None and status and not Task.can_transition(self.instance.status, status):
+            errors['status'] = f"Cannot move from {self.instance.status} to {status}."
         if status == 'completed':
             if not data.get('completion_report'):
                 errors['completion_report'] = 'Required for completion.'
@@ -34,4 +47,20 @@ class TaskSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         if 'assigned_to' in validated_data:
             raise serializers.ValidationError("Cannot change assignee.")
-        return super().update(instance, validated_data)
\ No newline at end of file
+        # Write only the columns whose value actually changed
+        changed = [field for field, value in validated_data.items() if getattr(instance, field) != value]
+        for field in changed:
+            setattr(instance, field, validated_data[field])
+        if changed:
+            instance.save(update_fields=changed)
+        return instance
+
+
+class ArchivedTaskSerializer(serializers.ModelSerializer):
+    assigned_to = UserSerializer(read_only=True)
+
+    class Meta:
+        model = ArchivedTask
+        fields = ['id', 'title', 'description', 'assigned_to', 'due_date', 'status', 'completion_report',
+                  'worked_hours', 'completed_at', 'archived_at']
+        read_only_fields = fields
@@ -0,0 +1,41 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .middleware import brotli
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.map', '.svg', '.txt', '.html', '.json', '.xml'}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest-hashed static files plus precompressed siblings: collectstatic
+    writes name.gz (and name.br when brotli is installed) next to every text
+    asset so the static middleware never compresses at request time.
+    """
+
+    # Fall back to hashing on the fly for files missing from the manifest instead of a 500
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+                continue
+            with self.open(name) as fh:
+                data = fh.read()
+            for suffix, compressed in self.compress(data):
+                with open(self.path(name + suffix), 'wb') as out:
+                    out.write(compressed)
+                yield name + suffix, name + suffix, True
+
+    def compress(self, data):
+        # Only keep a variant that saves at least 5%; the middleware serves the original otherwise
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data)))
+        return [(suffix, out) for suffix, out in variants if len(out) < len(data) * 0.95]
@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+
+# Set once per request by TenantMiddleware; unset in jobs and management commands
+_active_tenant = ContextVar('active_tenant', default=None)
+
+
+def get_active_tenant():
+    return _active_tenant.get()
+
+
+def active_tenant_id():
+    tenant = _active_tenant.get()
+    return tenant.pk if tenant is not None else None
+
+
+@contextmanager
+def use_tenant(tenant):
+    """Run a block as `tenant`: tenant-aware managers filter to it and new rows belong to it."""
+    token = _active_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _active_tenant.reset(token)
+
+
+def domain_cache_key(domain):
+    return f'tenant:{domain}'
+
+
+def tenant_for_domain(domain):
+    """The Tenant serving `domain`, else the DEFAULT_TENANT_DOMAIN tenant, else None. Cached, misses included."""
+    from .models import Tenant
+
+    fallback = getattr(settings, 'DEFAULT_TENANT_DOMAIN', '')
+    for candidate in dict.fromkeys(filter(None, [domain, fallback])):
+        key = domain_cache_key(candidate)
+        tenant = cache.get(key)
+        if tenant is None:
+            tenant = Tenant.objects.filter(domain=candidate).first() or False
+            cache.set(key, tenant, getattr(settings, 'TENANT_CACHE_TIMEOUT', 300))
+        if tenant:
+            return tenant
+    return None
+
+
+def current_tenant_id():
+    """
+    Default for the tenant column of new rows: the active tenant, or the
+    fallback tenant for code running outside a request.
+    """
+    tenant_id = active_tenant_id()
+    if tenant_id is None:
+        tenant = tenant_for_domain(None)
+        tenant_id = tenant.pk if tenant is not None else None
+    return tenant_id
+
+
+def cache_key(key, tenant_id=None):
+    """Prefix a cache key with the tenant, so each tenant's entries live in their own namespace."""
+    if tenant_id is None:
+        tenant_id = current_tenant_id()
+    return f't{tenant_id}:{key}'
+
+
+class TenantManager(models.Manager):
+    """Filters to the active tenant when there is one; unfiltered in jobs and commands."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tenant_id = active_tenant_id()
+        if tenant_id is not None:
+            queryset = queryset.filter(tenant_id=tenant_id)
+        return queryset
@@ -0,0 +1,174 @@
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'20/min' -> (capacity, tokens per second). The bucket refills fully over the period."""
+    if rate is None:
+        return None
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class MemoryBucketStore:
+    """Token buckets in a dict. Only shared between threads of one process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.counters = Counter()
+
+    def consume(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens < 1:
+                return False
+            self.buckets[key] = (tokens - 1, now)
+            return True
+
+    def incr(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def metrics(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+            self.counters.clear()
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a local SQLite file, shared by every worker process on the
+    host. Each check is one UPSERT on the primary key, so it is O(1) and atomic
+    without an explicit transaction.
+    """
+
+    CONSUME_SQL = (
+        'INSERT INTO buckets (key, tokens, updated) VALUES (?, ? - 1, ?) '
+        'ON CONFLICT(key) DO UPDATE SET '
+        'tokens = min(?, tokens + (excluded.updated - updated) * ?) - 1, updated = excluded.updated '
+        'WHERE min(?, tokens + (excluded.updated - updated) * ?) >= 1'
+    )
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+
+    @property
+    def connection(self):
+        conn = getattr(self.local, 'connection', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)')
+            self.local.connection = conn
+        return conn
+
+    def consume(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        conn = self.connection
+        cursor = conn.execute(self.CONSUME_SQL, (key, capacity, now, capacity, rate, capacity, rate))
+        if random.randrange(self.PRUNE_EVERY) == 0:
+            # A bucket idle long enough to refill completely is the same as no bucket
+            conn.execute('DELETE FROM buckets WHERE updated < ?', (now - 86400,))
+        return cursor.rowcount == 1
+
+    def incr(self, name):
+        self.connection.execute(
+            'INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1',
+            (name,),
+        )
+
+    def metrics(self):
+        return dict(self.connection.execute('SELECT name, value FROM counters'))
+
+    def clear(self):
+        self.connection.execute('DELETE FROM buckets')
+        self.connection.execute('DELETE FROM counters')
+
+
+_store = None
+
+
+def get_store():
+    """The store named by RATE_LIMIT_STORE: a SQLite file path, or '' for in-process memory."""
+    global _store
+    if _store is None:
+        path = getattr(settings, 'RATE_LIMIT_STORE', '')
+        _store = SQLiteBucketStore(path) if path else MemoryBucketStore()
+    return _store
+
+
+@receiver(setting_changed)
+def reset_store(setting, **kwargs):
+    global _store
+    if setting == 'RATE_LIMIT_STORE':
+        _store = None
+
+
+def allow(scope, ident):
+    """Take a token from the `scope` bucket for `ident`. False means throttled."""
+    parsed = parse_rate(getattr(settings, 'RATE_LIMITS', {}).get(scope))
+    if parsed is None or ident is None:
+        return True
+    capacity, rate = parsed
+    store = get_store()
+    if store.consume(f'{scope}:{ident}', capacity, rate):
+        return True
+    store.incr(f'throttled.{scope}')
+    return False
+
+
+def retry_after(scope):
+    """Seconds until the `scope` bucket has a token again, rounded up."""
+    parsed = parse_rate(getattr(settings, 'RATE_LIMITS', {}).get(scope))
+    return int(1 / parsed[1]) + 1 if parsed else None
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR')
+
+
+def allow_login(request, username):
+    """Check the per-IP and per-username login buckets before any password hashing."""
+    if not allow('login_ip', client_ip(request)):
+        return False, retry_after('login_ip')
+    # Only string usernames get a bucket; anything else from a JSON body can never authenticate
+    if isinstance(username, str) and username and not allow('login_username', username.lower()):
+        return False, retry_after('login_username')
+    return True, None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle over the shared token buckets, keyed by user id or client IP."""
+    scope = 'api'
+
+    def allow_request(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return allow(self.scope, ident)
+
+    def wait(self):
+        return retry_after(self.scope)
@@ -0,0 +1,17 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import tenancy
+from .models import RoleVersion
+from .permissions import tenant_roles
+
+
+class RoleRefreshToken(RefreshToken):
+    """Refresh token (and derived access tokens) carrying the user's roles in the tenant, role version and tenant."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['roles'] = sorted(tenant_roles(user))
+        token['role_version'] = RoleVersion.current(user.pk)
+        token['tenant'] = tenancy.active_tenant_id()
+        return token
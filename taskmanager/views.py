@@ -1,68 +1,32 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from rest_framework import generics, status
-from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import authenticate, login, logout
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from functools import wraps
-from .models import Task
-from .serializers import TaskSerializer
-from .permissions import IsAdminOrSuperAdmin, IsTaskOwnerOrAdmin
+from .models import Task, Job, TeamMembership, TenantRole, UserTombstone
+from .permissions import ADMIN_ROLES, tenant_roles, user_roles, scope_tasks
+from .search import search_tasks
+from . import throttling
+from django.conf import settings
 from .forms import UserCreationFormExtended, UserRoleForm, TaskForm
-from django.contrib.auth.models import User, Group
+from django.contrib.auth.models import User
 
 def Home(request):
     return render(request, 'admin_panel/welcome.html')
 
-# API Views
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def login_view(request):
-    username = request.data.get('username')
-    password = request.data.get('password')
-    user = authenticate(request, username=username, password=password)
-    if user:
-        refresh = RefreshToken.for_user(user)
-        return Response({
-            'access': str(refresh.access_token),
-            'refresh': str(refresh),
-        })
-    return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
-
-class TaskListView(generics.ListAPIView):
-    serializer_class = TaskSerializer
-    permission_classes = [IsAuthenticated]
-
-    def get_queryset(self):
-        return Task.objects.filter(assigned_to=self.request.user)
-
-class TaskUpdateView(generics.UpdateAPIView):
-    serializer_class = TaskSerializer
-    permission_classes = [IsAuthenticated, IsTaskOwnerOrAdmin]
-    lookup_field = 'id'
-    queryset = Task.objects.all()
-
-    def update(self, request, *args, **kwargs):
-        # Force partial=True for PUT to allow updating only status/report/hours
-        kwargs['partial'] = True
-        return super().update(request, *args, **kwargs)
-
-class TaskReportView(generics.RetrieveAPIView):
-    serializer_class = TaskSerializer
-    permission_classes = [IsAdminOrSuperAdmin]
-    lookup_field = 'id'
-    queryset = Task.objects.filter(status='completed')
-
 # Web Views for Admin Panel (unchanged)
 def admin_login_view(request):
     if request.method == 'POST':
         username = request.POST['username']
         password = request.POST['password']
+        allowed, wait = throttling.allow_login(request, username)
+        if not allowed:
+            messages.error(request, 'Too many login attempts. Try again later.')
+            response = render(request, 'admin_panel/login.html', status=429)
+            response['Retry-After'] = str(wait)
+            return response
         user = authenticate(request, username=username, password=password)
-        if user and user.groups.filter(name__in=['Admin', 'SuperAdmin']).exists():
+        if user and tenant_roles(user) & ADMIN_ROLES:
             login(request, user)
             return redirect('admin_dashboard')
         messages.error(request, 'Invalid login or insufficient permissions.')
@@ -75,7 +39,7 @@ def admin_logout_view(request):
 def superadmin_required(view_func):
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
-        if not request.user.groups.filter(name='SuperAdmin').exists():
+        if 'SuperAdmin' not in user_roles(request):
             messages.error(request, 'SuperAdmin only.')
             return redirect('admin_login')
         return view_func(request, *args, **kwargs)
@@ -84,7 +48,7 @@ def superadmin_required(view_func):
 def admin_required(view_func):
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
-        if not request.user.groups.filter(name__in=['Admin', 'SuperAdmin']).exists():
+        if not user_roles(request) & ADMIN_ROLES:
             messages.error(request, 'Admin/SuperAdmin only.')
             return redirect('admin_login')
         return view_func(request, *args, **kwargs)
@@ -95,10 +59,28 @@ def admin_required(view_func):
 def admin_dashboard(request):
     return render(request, 'admin_panel/dashboard.html')
 
+def tenant_users(include_deleted=False):
+    # Users belong to the current tenant through their team memberships
+    users = User.objects.filter(pk__in=TeamMembership.objects.values('user_id'))
+    return users if include_deleted else users.exclude(pk__in=UserTombstone.objects.values('user_id'))
+
 @login_required
 @superadmin_required
 def user_list(request):
-    users = User.objects.all()
+    users = list(tenant_users(include_deleted=True))
+    tombstones = {tombstone.user_id: tombstone for tombstone in UserTombstone.objects.all()}
+    roles = {}
+    for user_id, name in TenantRole.objects.order_by('group__name').values_list('user_id', 'group__name'):
+        roles.setdefault(user_id, []).append(name)
+    deletions = {
+        job.payload.get('user_id'): job
+        for job in Job.objects.filter(name='delete_user', status__in=['queued', 'running'])
+        if job.payload.get('tenant_id') in (None, request.tenant.pk)
+    }
+    for user in users:
+        user.tombstone = tombstones.get(user.pk)
+        user.role_names = roles.get(user.pk, [])
+        user.deletion = deletions.get(user.pk)
     return render(request, 'admin_panel/users/list.html', {'users': users})
 
 @login_required
@@ -117,62 +99,84 @@ def create_user(request):
 @login_required
 @superadmin_required
 def edit_user_role(request, pk):
-    user = get_object_or_404(User, pk=pk)
+    user = get_object_or_404(tenant_users(), pk=pk)
     if request.method == 'POST':
-        form = UserRoleForm(request.POST, instance=user)
+        form = UserRoleForm(request.POST, user=user)
         if form.is_valid():
-            user.groups.clear()
-            for group in form.cleaned_data['groups']:
-                user.groups.add(group)
-            user.save()
+            TenantRole.set_roles(user, form.cleaned_data['groups'])
+            # Admins only see the teams they manage, so the membership role follows the role
+            names = {group.name for group in form.cleaned_data['groups']}
+            TeamMembership.set_manager(user, bool(names & ADMIN_ROLES))
             messages.success(request, 'Role updated.')
             return redirect('user_list')
     else:
-        form = UserRoleForm(instance=user)
+        form = UserRoleForm(user=user)
     return render(request, 'admin_panel/users/role_form.html', {'form': form, 'user': user})
 
 @login_required
 @superadmin_required
 def delete_user(request, pk):
-    user = get_object_or_404(User, pk=pk)
+    user = get_object_or_404(tenant_users(), pk=pk)
     if request.method == 'POST':
-        user.delete()
-        messages.success(request, 'User deleted.')
+        # Lock the account and hide its tasks now; purge_deleted removes them after the retention period
+        UserTombstone.delete_user(user)
+        days = getattr(settings, 'SOFT_DELETE_RETENTION_DAYS', 30)
+        messages.success(request, f'User deleted. It can be restored for {days} days.')
         return redirect('user_list')
     return render(request, 'admin_panel/users/confirm_delete.html', {'user': user})
 
+@login_required
+@superadmin_required
+def restore_user(request, pk):
+    user = get_object_or_404(tenant_users(include_deleted=True), pk=pk)
+    if request.method == 'POST':
+        tombstone = UserTombstone.objects.filter(user=user).first()
+        if tombstone is not None:
+            tombstone.restore()
+            messages.success(request, 'User restored.')
+    return redirect('user_list')
+
 @login_required
 @superadmin_required
 def admin_list(request):
-    admins = User.objects.filter(groups__name='Admin')
+    admins = tenant_users().filter(pk__in=TenantRole.objects.filter(group__name='Admin').values('user_id'))
     return render(request, 'admin_panel/admins/list.html', {'admins': admins})
 
 @login_required
 @admin_required
 def task_list(request):
-    if request.user.groups.filter(name='SuperAdmin').exists():
-        tasks = Task.objects.all()
+    tasks = scope_tasks(request, Task.objects.select_related('assigned_to'))
+    query = request.GET.get('q', '').strip()
+    if query:
+        tasks = search_tasks(tasks, query)
+    return render(request, 'admin_panel/tasks/list.html', {'tasks': tasks, 'query': query})
+
+def limit_assignees(request, form):
+    # Admins may only assign tasks to members of the teams they manage, SuperAdmins to the tenant's users
+    if 'SuperAdmin' in user_roles(request):
+        form.fields['assigned_to'].queryset = tenant_users()
     else:
-        tasks = Task.objects.filter(assigned_to__groups__name='User')
-    return render(request, 'admin_panel/tasks/list.html', {'tasks': tasks})
+        team_ids = TeamMembership.managed_team_ids(request.user.id)
+        form.fields['assigned_to'].queryset = User.objects.filter(pk__in=TeamMembership.member_ids(team_ids))
+    return form
 
 @login_required
 @admin_required
 def create_task(request):
     if request.method == 'POST':
-        form = TaskForm(request.POST)
+        form = limit_assignees(request, TaskForm(request.POST))
         if form.is_valid():
             task = form.save()
             messages.success(request, 'Task created.')
             return redirect('task_list')
     else:
-        form = TaskForm()
+        form = limit_assignees(request, TaskForm())
     return render(request, 'admin_panel/tasks/form.html', {'form': form})
 
 @login_required
 @admin_required
 def task_detail(request, pk):
-    task = get_object_or_404(Task, pk=pk)
+    task = get_object_or_404(scope_tasks(request, Task.objects.all()), pk=pk)
     report = task.completion_report if task.status == 'completed' else None
     hours = task.worked_hours if task.status == 'completed' else None
     return render(request, 'admin_panel/tasks/detail.html', {
@@ -182,13 +186,13 @@ def task_detail(request, pk):
 @login_required
 @admin_required
 def update_task(request, pk):
-    task = get_object_or_404(Task, pk=pk)
+    task = get_object_or_404(scope_tasks(request, Task.objects.all()), pk=pk)
     if request.method == 'POST':
-        form = TaskForm(request.POST, instance=task)
+        form = limit_assignees(request, TaskForm(request.POST, instance=task))
         if form.is_valid():
             form.save()
             messages.success(request, 'Task updated.')
             return redirect('task_list')
     else:
-        form = TaskForm(instance=task)
+        form = limit_assignees(request, TaskForm(instance=task))
     return render(request, 'admin_panel/tasks/form.html', {'form': form})
\ No newline at end of file